@@ -14,9 +14,11 @@ using Selenium. The schema for each alum (using Polars data types) is as follows
 Master's—only the most recent degree is listed. Listed "alumni" with no graduation year
 or with a graduation year later than the current year are excluded, as these may be
 current students.) The structured data is then saved to the `mta_alumni.csv` file.
-Profile URLs collected in the initial phase of the scraping process are also saved to a
-temporary text file in a `temp/` directory, just in case the account is flagged and
-banned by LinkedIn midway through the scraping process (or any other error is thrown).
+Progress is kept in a `temp/` directory (the collected profile URLs, the profiles
+scraped so far, and your signed-in browser session, so keep it private), just in case
+the account is flagged and banned by LinkedIn midway through the scraping process (or
+any other error is thrown). Rerunning the script resumes from there, skipping profiles
+already visited and appending new alumni to the CSV.
 
 This script was created at the behest of MtA's Recruitment and Admissions Coordinator,
 Curtis Michaelis, for data analysis by the Recruitment and Admissions Office. To run it
@@ -40,21 +42,31 @@ Email: lm.varona@outlook.com
 """
 
 # %%
+import asyncio
+import json
+import pickle
 import random
 import re
 
-from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from sys import argv
+from sys import argv, stderr
 from time import sleep
+from types import MappingProxyType
+from typing import NamedTuple, TextIO
 from uuid import uuid4
 
+import httpx
 import polars as pl
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import (
+    InvalidCookieDomainException,
+    NoSuchElementException,
+    UnableToSetCookieException,
+)
 from selenium.webdriver import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
@@ -63,9 +75,25 @@ from selenium.webdriver.remote.webelement import WebElement
 # %%
 DEST: str = "mta_alumni.csv"
 TEMP_DIR: str = "temp"
-BATCH_SIZE: int = 5
+PROFILE_DIR: str = "ff_profile"
+SEEN_FILE: str = "seen_profiles.txt"
+SESSION_FILE: str = "session.pkl"
+SIDECAR_FILE: str = "profiles.jsonl"
+DEST_MARKER_FILE: str = "dest_written"
+MAX_CONCURRENT_REQUESTS: int = 3
+THROTTLE_STATUS_CODES: frozenset[int] = frozenset({429, 999})
 CURRENT_YEAR: int = datetime.now().year
 
+SCHEMA: dict[str, type[pl.DataType]] = {
+    "full_name": pl.String,
+    "latest_title": pl.String,
+    "latest_company": pl.String,
+    "mta_degree": pl.String,
+    "mta_grad_year": pl.UInt16,
+    "location": pl.String,
+    "profile_url": pl.String,
+}
+
 MIN_SHORT_WAIT: float = 0.1
 MAX_SHORT_WAIT: float = 0.4
 MIN_MEDIUM_WAIT: int = 2
@@ -90,98 +118,284 @@ MAX_SCROLLS_LONG_DELAY: int = 12
 MIN_PARTIAL_SCROLL: float = 0.6
 MAX_PARTIAL_SCROLL: float = 0.8
 
-MIN_RANDOM_SCROLL: float = 0.2
-MAX_RANDOM_SCROLL: float = 0.8
-
 MAX_BUTTON_OFFSET: int = 5
 
+WRITE_BUFFER_SIZE: int = 1 << 20
+
+SCRIPT_TIMEOUT: int = 300
+
+USER_AGENT: str = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/91.0.4472.124 Safari/537.36"
+)
+
+_MONTHS: MappingProxyType[str, int] = MappingProxyType(
+    {
+        "jan": 1,
+        "feb": 2,
+        "mar": 3,
+        "apr": 4,
+        "may": 5,
+        "jun": 6,
+        "jul": 7,
+        "aug": 8,
+        "sep": 9,
+        "oct": 10,
+        "nov": 11,
+        "dec": 12,
+    }
+)
+
+_RE_PRESENT: re.Pattern[str] = re.compile(r"\bpresent\b", re.IGNORECASE)
+_RE_MONTH_YEAR: re.Pattern[str] = re.compile(r"([A-Za-z]{3,9})\s+(\d{4})")
+_RE_YEAR4: re.Pattern[str] = re.compile(r"\d{4}")
+
+SMOOTH_SCROLL_SCRIPT: str = """
+const [offset, minStep, maxStep, minShort, maxShort, minLong, maxLong, longEvery] =
+    arguments;
+const done = arguments[arguments.length - 1];
+const uniform = (min, max) => min + Math.random() * (max - min);
+let scrolled = 0;
+let scrolls = 0;
+
+function scroll() {
+    if (scrolled >= offset) {
+        done();
+        return;
+    }
+
+    scrolls += 1;
+    const delay = scrolls % longEvery === 0
+        ? uniform(minLong, maxLong)
+        : uniform(minShort, maxShort);
+
+    setTimeout(() => {
+        const step = Math.floor(uniform(minStep, maxStep + 1));
+        const clipped = Math.min(step, offset - scrolled);
+        window.scrollBy(0, clipped);
+        scrolled += clipped;
+        scroll();
+    }, delay * 1000);
+}
+
+scroll();
+"""
+
+PROFILE_HREFS_SCRIPT: str = """
+return Array.from(
+    document.querySelectorAll("a[href^='https://www.linkedin.com/in/']"),
+    (a) => a.getAttribute("href"),
+);
+"""
+
+_BOLD_SPAN_SELECTOR: str = (
+    "div.display-flex.align-items-center.mr1.hoverable-link-text.t-bold"
+    " > span[aria-hidden='true']"
+)
+
 
 # %%
-@dataclass
-class AlumniProfile:
+class AlumniProfile(NamedTuple):
     full_name: str
     latest_title: str | None
     latest_company: str | None
     mta_degree: str | None
     mta_grad_year: int
-    location: str
+    location: str | None
     profile_url: str
 
 
+class ProfileUnavailableError(Exception):
+    pass
+
+
+class NotYetGraduatedError(Exception):
+    pass
+
+
 # %%
 def main() -> None:
     email = argv[1]
     password = argv[2]
     max_clicks = int(argv[3])
 
-    alumni_profiles = []
+    temp_dir = Path(TEMP_DIR)
+    temp_dir.mkdir(exist_ok=True)
+    session_file = temp_dir / SESSION_FILE
+    seen_file = temp_dir / SEEN_FILE
+    temp_file = temp_dir / f"profile_urls_{uuid4().hex}.txt"
+    sidecar = temp_dir / SIDECAR_FILE
+    dest_marker = temp_dir / DEST_MARKER_FILE
+
+    with webdriver.Firefox(get_stealth_options(get_profile_dir())) as driver:
+        driver.set_script_timeout(SCRIPT_TIMEOUT)
+
+        signed_in = is_signed_in(driver) or restore_session(driver, session_file)
+
+        if not signed_in:
+            sign_in_linkedin(driver, email, password)
+            signed_in = is_signed_in(driver)
 
-    with webdriver.Firefox(get_stealth_options()) as driver:
-        sign_in_linkedin(driver, email, password)
-        show_more_alumni(driver, max_clicks)
-        profile_urls = get_profile_urls(driver)
+        if signed_in:
+            save_session(driver.get_cookies(), session_file)
 
-        temp_dir = Path(TEMP_DIR)
-        temp_dir.mkdir(exist_ok=True)
-        temp_file = temp_dir / f"profile_urls_{uuid4().hex}.txt"
+        with open(temp_file, "w", buffering=WRITE_BUFFER_SIZE) as f:
+            found_urls = show_more_alumni(driver, max_clicks, f)
 
-        with open(temp_file, "w") as f:
-            f.write("\n".join(profile_urls))
-            f.write("\n")
+        cookies = driver.get_cookies()
 
-        for ct, url in enumerate(profile_urls, 1):
-            alumni_profile = scrape_profile(driver, url)
-            mta_grad_year = alumni_profile.mta_grad_year
+    seen_urls = load_seen_urls(seen_file)
+    append = dest_marker.exists() and Path(DEST).exists()
+    profile_urls = [url for url in found_urls if url not in seen_urls]
 
-            if mta_grad_year is not None and mta_grad_year <= CURRENT_YEAR:
-                alumni_profiles.append(alumni_profile)
+    with open(sidecar, "a", buffering=1) as f, open(seen_file, "a", buffering=1) as g:
+        asyncio.run(scrape_all(profile_urls, cookies, f, g))
+
+    if sidecar.stat().st_size > 0:
+        schema = SCHEMA | {"mta_grad_year": pl.Int64}
+        df = pl.read_ndjson(sidecar, schema=schema).with_columns(
+            pl.col("mta_grad_year").cast(pl.UInt16)
+        )
+        write_to_csv(df, DEST, append)
+        dest_marker.touch()
+
+    sidecar.unlink()
+
+
+async def scrape_all(
+    profile_urls: list[str], cookies: list[dict], sidecar: TextIO, seen: TextIO
+) -> None:
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    try:
+        async with get_client(cookies) as client, asyncio.TaskGroup() as tg:
+            for url in profile_urls:
+                tg.create_task(scrape_into(client, semaphore, url, sidecar, seen))
+    except* httpx.HTTPStatusError as eg:
+        print(
+            f"Stopping early, LinkedIn is throttling: {eg.exceptions[0]}", file=stderr
+        )
 
-            if ct % BATCH_SIZE == 0:
-                df = profiles_to_df(alumni_profiles)
-                alumni_profiles.clear()
 
-                if ct == BATCH_SIZE:
-                    df.write_csv(DEST)
-                else:
-                    append_to_csv(df, DEST)
+async def scrape_into(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    profile_url: str,
+    sidecar: TextIO,
+    seen: TextIO,
+) -> None:
+    try:
+        alumni_profile = await scrape_profile(client, semaphore, profile_url)
+    except NotYetGraduatedError:
+        return
+    except (httpx.HTTPError, ProfileUnavailableError) as e:
+        if (
+            isinstance(e, httpx.HTTPStatusError)
+            and e.response.status_code in THROTTLE_STATUS_CODES
+        ):
+            raise
 
-        if alumni_profiles:
-            append_to_csv(profiles_to_df(alumni_profiles), DEST)
+        print(f"Skipping {profile_url}: {e}", file=stderr)
+        return
+
+    if alumni_profile is not None:
+        sidecar.write(json.dumps(alumni_profile._asdict()))
+        sidecar.write("\n")
+
+    seen.write(profile_url)
+    seen.write("\n")
+
+
+def load_seen_urls(seen_file: Path) -> set[str]:
+    if not seen_file.exists():
+        return set()
+
+    with open(seen_file) as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
 
 
 # %%
-def get_stealth_options() -> webdriver.FirefoxOptions:
+def get_profile_dir() -> Path:
+    profile_dir = Path(TEMP_DIR) / PROFILE_DIR
+    profile_dir.mkdir(parents=True, exist_ok=True)
+
+    return profile_dir
+
+
+def get_stealth_options(profile_dir: Path) -> webdriver.FirefoxOptions:
     options = webdriver.FirefoxOptions()
+    options.add_argument("-profile")
+    options.add_argument(str(profile_dir))
     options.set_preference("dom.webdriver.enabled", False)
     options.set_preference("useAutomationExtension", False)
     options.set_preference("media.peerconnection.enabled", False)
-    options.set_preference(
-        "general.useragent.override",
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/91.0.4472.124 Safari/537.36",
-    )
+    options.set_preference("general.useragent.override", USER_AGENT)
+
+    options.set_preference("browser.cache.disk.enable", True)
+    options.set_preference("browser.cache.disk.smart_size.enabled", False)
+    options.set_preference("browser.cache.disk.capacity", 1048576)
+
+    options.set_preference("toolkit.telemetry.enabled", False)
+    options.set_preference("toolkit.telemetry.unified", False)
+    options.set_preference("datareporting.healthreport.uploadEnabled", False)
+    options.set_preference("datareporting.policy.dataSubmissionEnabled", False)
+    options.set_preference("browser.safebrowsing.malware.enabled", False)
+    options.set_preference("browser.safebrowsing.phishing.enabled", False)
+    options.set_preference("browser.safebrowsing.downloads.enabled", False)
+
+    options.set_preference("browser.contentblocking.category", "strict")
+    options.set_preference("privacy.trackingprotection.enabled", True)
+    options.set_preference("privacy.trackingprotection.socialtracking.enabled", True)
+    options.set_preference("privacy.trackingprotection.cryptomining.enabled", True)
+    options.set_preference("privacy.trackingprotection.fingerprinting.enabled", True)
+    options.set_preference("media.autoplay.default", 5)
+    options.set_preference("gfx.downloadable_fonts.enabled", False)
 
     return options
 
 
+def get_client(cookies: list[dict]) -> httpx.AsyncClient:
+    jar = httpx.Cookies()
+
+    for cookie in cookies:
+        jar.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+
+    limits = httpx.Limits(
+        max_connections=MAX_CONCURRENT_REQUESTS,
+        max_keepalive_connections=MAX_CONCURRENT_REQUESTS,
+    )
+
+    return httpx.AsyncClient(
+        http2=True,
+        cookies=jar,
+        headers={"User-Agent": USER_AGENT},
+        limits=limits,
+        follow_redirects=True,
+    )
+
+
 # %%
 def wait(long: bool = False) -> None:
-    if long:
-        min_wait, max_wait = MIN_LONG_WAIT, MAX_LONG_WAIT
-    else:
-        min_wait, max_wait = MIN_MEDIUM_WAIT, MAX_MEDIUM_WAIT
+    sleep(wait_duration(long))
 
-    sleep(random.uniform(min_wait, max_wait))
 
+async def async_wait(long: bool = False) -> None:
+    await asyncio.sleep(wait_duration(long))
 
-def scroll_delay(long: bool = False) -> None:
+
+def wait_duration(long: bool = False) -> float:
     if long:
-        min_wait, max_wait = MIN_LONG_SCROLL_LONG_DELAY, MAX_LONG_SCROLL_LONG_DELAY
+        min_wait, max_wait = MIN_LONG_WAIT, MAX_LONG_WAIT
     else:
-        min_wait, max_wait = MIN_SHORT_SCROLL_DELAY, MAX_SHORT_SCROLL_DELAY
+        min_wait, max_wait = MIN_MEDIUM_WAIT, MAX_MEDIUM_WAIT
 
-    sleep(random.uniform(min_wait, max_wait))
+    return random.uniform(min_wait, max_wait)
 
 
 def human_click(driver: webdriver.Firefox, element: WebElement) -> None:
@@ -196,26 +410,49 @@ def human_click(driver: webdriver.Firefox, element: WebElement) -> None:
 
 
 def smooth_scroll(driver: webdriver.Firefox, offset: int) -> None:
-    scrolled = 0
-    scrolls = 0
     scrolls_long_delay = random.randint(MIN_SCROLLS_LONG_DELAY, MAX_SCROLLS_LONG_DELAY)
+    driver.execute_async_script(
+        SMOOTH_SCROLL_SCRIPT,
+        offset,
+        MIN_SCROLL_STEP,
+        MAX_SCROLL_STEP,
+        MIN_SHORT_SCROLL_DELAY,
+        MAX_SHORT_SCROLL_DELAY,
+        MIN_LONG_SCROLL_LONG_DELAY,
+        MAX_LONG_SCROLL_LONG_DELAY,
+        scrolls_long_delay,
+    )
 
-    while scrolled < offset:
-        scrolls += 1
 
-        if scrolls % scrolls_long_delay == 0:
-            long = True
-        else:
-            long = False
+# %%
+def is_signed_in(driver: webdriver.Firefox) -> bool:
+    wait()
+    driver.get("https://www.linkedin.com/feed/")
 
-        scroll_delay(long)
-        step = random.randint(MIN_SCROLL_STEP, MAX_SCROLL_STEP)
-        step = min(step, offset - scrolled)
-        driver.execute_script(f"window.scrollBy(0, {step});")
-        scrolled += step
+    return driver.current_url.startswith("https://www.linkedin.com/feed")
+
+
+def restore_session(driver: webdriver.Firefox, session_file: Path) -> bool:
+    if not session_file.exists():
+        return False
+
+    with open(session_file, "rb") as f:
+        cookies = pickle.load(f)
+
+    try:
+        for cookie in cookies:
+            driver.add_cookie(cookie)
+    except (InvalidCookieDomainException, UnableToSetCookieException):
+        return False
+
+    return is_signed_in(driver)
+
+
+def save_session(cookies: list[dict], session_file: Path) -> None:
+    with open(session_file, "wb") as f:
+        pickle.dump(cookies, f)
 
 
-# %%
 def sign_in_linkedin(driver: webdriver.Firefox, email: str, password: str) -> None:
     wait()
     source_login = "https://www.linkedin.com/login"
@@ -235,7 +472,9 @@ def sign_in_linkedin(driver: webdriver.Firefox, email: str, password: str) -> No
 
 
 # %%
-def show_more_alumni(driver: webdriver.Firefox, max_clicks: int) -> None:
+def show_more_alumni(
+    driver: webdriver.Firefox, max_clicks: int, url_file: TextIO
+) -> set[str]:
     wait(True)
     source_alumni = "https://www.linkedin.com/school/mount-allison-university/people/"
     driver.get(source_alumni)
@@ -244,14 +483,17 @@ def show_more_alumni(driver: webdriver.Firefox, max_clicks: int) -> None:
     more_results = True
     clicks = 0
     clicks_long_wait = random.randint(MIN_CLICKS_LONG_WAIT, MAX_CLICKS_LONG_WAIT)
+    profile_urls: set[str] = set()
 
     while more_results and clicks < max_clicks:
         clicks += 1
 
         try:
             wait()
-            page_height = driver.execute_script("return document.body.scrollHeight")
-            scrolled = driver.execute_script("return window.scrollY")
+            record_profile_urls(driver, profile_urls, url_file)
+            page_height, scrolled = driver.execute_script(
+                "return [document.body.scrollHeight, window.scrollY];"
+            )
 
             if random.choice([False, True]):
                 offset = page_height
@@ -277,40 +519,65 @@ def show_more_alumni(driver: webdriver.Firefox, max_clicks: int) -> None:
         except NoSuchElementException:
             more_results = False
 
+    record_profile_urls(driver, profile_urls, url_file)
 
-# %%
-def get_profile_urls(driver: webdriver.Firefox) -> set[str]:
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    profile_urls = set()
+    return profile_urls
 
-    for tag in soup.select("a[href^='https://www.linkedin.com/in/']"):
-        pot_profile_url = tag["href"]
 
-        if pot_profile_url.startswith("https://www.linkedin.com/in/"):
-            profile_url = pot_profile_url.split("?")[0]
+# %%
+def record_profile_urls(
+    driver: webdriver.Firefox, profile_urls: set[str], url_file: TextIO
+) -> None:
+    for href in driver.execute_script(PROFILE_HREFS_SCRIPT):
+        profile_url = href.partition("?")[0]
+
+        if profile_url not in profile_urls:
             profile_urls.add(profile_url)
+            url_file.write(profile_url)
+            url_file.write("\n")
 
-    return profile_urls
+    url_file.flush()
 
 
 # %%
-def scrape_profile(driver: webdriver.Firefox, profile_url: str) -> AlumniProfile:
-    wait(random.choice([False, True]))
-    driver.get(profile_url)
+async def scrape_profile(
+    client: httpx.AsyncClient, semaphore: asyncio.Semaphore, profile_url: str
+) -> AlumniProfile | None:
+    async with semaphore:
+        await async_wait(random.choice([False, True]))
+        response = await client.get(profile_url)
+        response.raise_for_status()
+
+    if not response.url.path.startswith("/in/"):
+        raise ProfileUnavailableError(f"{profile_url} redirected to {response.url}")
+
+    loop = asyncio.get_running_loop()
+
+    try:
+        return await loop.run_in_executor(
+            None, parse_profile, response.content, profile_url
+        )
+    except (AttributeError, IndexError) as e:
+        raise ProfileUnavailableError(f"{profile_url} could not be parsed") from e
 
-    wait()
-    soup = BeautifulSoup(driver.page_source, "html.parser")
 
-    if random.choice([False, True]):
-        page_height = driver.execute_script("return document.body.scrollHeight")
-        target = random.randint(
-            int(MIN_RANDOM_SCROLL * page_height), int(MAX_RANDOM_SCROLL * page_height)
-        )
-        smooth_scroll(driver, target)
+def parse_profile(html: bytes, profile_url: str) -> AlumniProfile | None:
+    soup = BeautifulSoup(html, "lxml")
+
+    if soup.find("h1") is None or soup.select_one("section.artdeco-card") is None:
+        raise ProfileUnavailableError(f"{profile_url} did not return a profile page")
+
+    sections = _index_sections(soup)
+    mta_degree, mta_grad_year = _extract_education(sections.get("Education"))
+
+    if mta_grad_year is None:
+        return None
+
+    if mta_grad_year > CURRENT_YEAR:
+        raise NotYetGraduatedError(f"{profile_url} graduates in {mta_grad_year}")
 
     full_name = get_full_name(soup)
-    latest_title, latest_company = get_latest_employment(soup)
-    mta_degree, mta_grad_year = get_mta_education(soup)
+    latest_title, latest_company = _extract_employment(sections.get("Experience"))
     location = get_location(soup)
 
     return AlumniProfile(
@@ -324,60 +591,31 @@ def scrape_profile(driver: webdriver.Firefox, profile_url: str) -> AlumniProfile
     )
 
 
-def get_full_name(soup: BeautifulSoup) -> str:
-    return soup.find("h1").get_text(strip=True)
+def _index_sections(soup: BeautifulSoup) -> dict[str, Tag]:
+    sections: dict[str, Tag] = {}
 
+    for section in soup.select("section.artdeco-card"):
+        header = section.select_one("h2 span[aria-hidden='true']")
 
-def get_latest_employment(soup: BeautifulSoup) -> tuple[str | None, str | None]:
-    def _parse_end_date_from_text(text: str) -> tuple[int, int]:
-        left = text.split("·", 1)[0].strip()
-
-        if re.search(r"\bpresent\b", left, re.IGNORECASE):
-            year = CURRENT_YEAR + 1
-            month = 12
-        else:
-            full_match = re.findall(r"([A-Za-z]{3,9})\s+(\d{4})", left)
-
-            if full_match:
-                month_str, year_str = full_match[-1]
-                months = {
-                    "jan": 1,
-                    "feb": 2,
-                    "mar": 3,
-                    "apr": 4,
-                    "may": 5,
-                    "jun": 6,
-                    "jul": 7,
-                    "aug": 8,
-                    "sep": 9,
-                    "oct": 10,
-                    "nov": 11,
-                    "dec": 12,
-                }
-                year = int(year_str)
-                month = months[month_str[:3].lower()]
-            else:
-                year = int(re.findall(r"\d{4}", left)[-1])
-                month = 0
+        if header:
+            sections.setdefault(header.get_text(strip=True), section)
 
-        return year, month
+    return sections
 
-    experience_section = None
 
-    for section in soup.select("section.artdeco-card"):
-        header = section.select_one("h2 span[aria-hidden='true']")
+def get_full_name(soup: BeautifulSoup) -> str:
+    return soup.find("h1").get_text(strip=True)
 
-        if header and "Experience" in header.get_text(strip=True):
-            experience_section = section
-            break
 
+def _extract_employment(section: Tag | None) -> tuple[str | None, str | None]:
     latest_title = None
     latest_company = None
 
-    if experience_section:
-        roles = []
+    if section:
+        best_key = (-1, -1)
 
-        for exp in experience_section.select("li.artdeco-list__item"):
+        for exp in section.select("li.artdeco-list__item"):
+            bold_tag = exp.select_one(_BOLD_SPAN_SELECTOR)
             role_lis = [
                 li
                 for li in exp.select("ul li")
@@ -385,35 +623,26 @@ def get_latest_employment(soup: BeautifulSoup) -> tuple[str | None, str | None]:
             ]
 
             if role_lis:
-                company_tag = exp.select_one(
-                    "div.display-flex.align-items-center.mr1.hoverable-link-text.t-bold > span[aria-hidden='true']"
-                )
-                company_text = company_tag.get_text(strip=True)
+                company_text = bold_tag.get_text(strip=True)
 
                 for role in role_lis:
-                    title_tag = role.select_one(
-                        "div.display-flex.align-items-center.mr1.hoverable-link-text.t-bold > span[aria-hidden='true']"
-                    ) or role.select_one("span[aria-hidden='true']")
+                    title_tag = role.select_one(_BOLD_SPAN_SELECTOR) or role.select_one(
+                        "span[aria-hidden='true']"
+                    )
                     date_tag = role.select_one("span.pvs-entity__caption-wrapper")
 
                     if title_tag:
                         title_text = title_tag.get_text(strip=True)
-                        end_year, end_month = _parse_end_date_from_text(
+                        end_key = _parse_end_date_from_text(
                             date_tag.get_text(strip=True)
                         )
 
-                        roles.append(
-                            {
-                                "title": title_text,
-                                "company": company_text,
-                                "end_year": end_year,
-                                "end_month": end_month,
-                            }
-                        )
+                        if end_key > best_key:
+                            best_key = end_key
+                            latest_title = title_text
+                            latest_company = company_text
             else:
-                title_tag = exp.select_one(
-                    "div.display-flex.align-items-center.mr1.hoverable-link-text.t-bold > span[aria-hidden='true']"
-                ) or exp.select_one("span[aria-hidden='true']")
+                title_tag = bold_tag or exp.select_one("span[aria-hidden='true']")
 
                 if title_tag:
                     company_tag = exp.select_one(
@@ -424,43 +653,82 @@ def get_latest_employment(soup: BeautifulSoup) -> tuple[str | None, str | None]:
                     title_text = title_tag.get_text(strip=True)
                     company_text = company_tag.get_text(strip=True)
                     date_text = date_tag.get_text(strip=True)
-                    end_year, end_month = _parse_end_date_from_text(date_text)
-
-                    roles.append(
-                        {
-                            "title": title_text,
-                            "company": company_text,
-                            "end_year": end_year,
-                            "end_month": end_month,
-                        }
-                    )
+                    end_key = _parse_end_date_from_text(date_text)
 
-        if roles:
-            for r in roles:
-                r["company"] = r["company"].rsplit("·", 1)[0].strip()
+                    if end_key > best_key:
+                        best_key = end_key
+                        latest_title = title_text
+                        latest_company = company_text
 
-            roles.sort(key=lambda r: (r["end_year"], r["end_month"]), reverse=True)
-            newest = roles[0]
-            latest_title = newest["title"]
-            latest_company = newest["company"]
+        if latest_company is not None:
+            company, sep, _ = latest_company.rpartition("·")
+            latest_company = (company if sep else latest_company).strip()
 
     return latest_title, latest_company
 
 
-def get_mta_education(soup: BeautifulSoup) -> tuple[str | None, int]:
-    mta_degree = None
-    mta_grad_year = None
-    edu_section = None
+@lru_cache(maxsize=4096)
+def _parse_end_date_from_text(text: str) -> tuple[int, int]:
+    left = text.partition("·")[0]
 
-    for section in soup.select("section.artdeco-card"):
-        label = section.select_one("h2.pvs-header__title span[aria-hidden='true']")
+    if "present" in left.lower() and _RE_PRESENT.search(left):
+        return CURRENT_YEAR + 1, 12
 
-        if label and label.get_text(strip=True) == "Education":
-            edu_section = section
+    for i in range(len(left) - 4, -1, -1):
+        if left[i : i + 4].isdecimal():
             break
+    else:
+        return _parse_end_date_with_regex(left)
+
+    if (i > 0 and left[i - 1].isdecimal()) or left[i + 4 : i + 5].isdecimal():
+        return _parse_end_date_with_regex(left)
+
+    year = int(left[i : i + 4])
+    before = left[:i].rstrip()
+    start = len(before)
+
+    while start > 0 and before[start - 1].isascii() and before[start - 1].isalpha():
+        start -= 1
+
+    month_str = before[start:]
+
+    if month_str and len(before) < i:
+        month = _MONTHS.get(month_str[:3].lower())
+
+        if month is not None and 3 <= len(month_str) <= 9:
+            return year, month
+    elif not any(char.isalpha() for char in left):
+        return year, 0
+
+    return _parse_end_date_with_regex(left)
+
 
-    if edu_section:
-        for edu in edu_section.select("li.artdeco-list__item"):
+def _parse_end_date_with_regex(left: str) -> tuple[int, int]:
+    left = left.strip()
+
+    if _RE_PRESENT.search(left):
+        year = CURRENT_YEAR + 1
+        month = 12
+    else:
+        full_match = _RE_MONTH_YEAR.findall(left)
+
+        if full_match:
+            month_str, year_str = full_match[-1]
+            year = int(year_str)
+            month = _MONTHS[month_str[:3].lower()]
+        else:
+            year = int(_RE_YEAR4.findall(left)[-1])
+            month = 0
+
+    return year, month
+
+
+def _extract_education(section: Tag | None) -> tuple[str | None, int]:
+    mta_degree = None
+    mta_grad_year = None
+
+    if section:
+        for edu in section.select("li.artdeco-list__item"):
             school_tag = edu.select_one(
                 "div.display-flex.align-items-center.mr1 span[aria-hidden='true']"
             )
@@ -481,7 +749,7 @@ def get_mta_education(soup: BeautifulSoup) -> tuple[str | None, int]:
 
                 if years_tag:
                     years_text = years_tag.get_text(strip=True)
-                    match = re.findall(r"\d{4}", years_text)
+                    match = _RE_YEAR4.findall(years_text)
 
                     if match:
                         mta_grad_year = int(match[-1])
@@ -491,23 +759,21 @@ def get_mta_education(soup: BeautifulSoup) -> tuple[str | None, int]:
     return mta_degree, mta_grad_year
 
 
-def get_location(soup: BeautifulSoup) -> str:
+def get_location(soup: BeautifulSoup) -> str | None:
     location_tag = soup.select_one(
         "span.text-body-small.inline.t-black--light.break-words"
     )
 
-    return location_tag.get_text(strip=True)
+    return location_tag.get_text(strip=True) if location_tag else None
 
 
 # %%
-def profiles_to_df(profiles: list[AlumniProfile]) -> pl.DataFrame:
-    df = pl.DataFrame([profile.__dict__ for profile in profiles])
-    return df.with_columns(pl.col("mta_grad_year").cast(pl.UInt16))
-
-
-def append_to_csv(df: pl.DataFrame, dest: str) -> None:
-    with open(dest, "a") as f:
-        df.write_csv(f, include_header=False)
+def write_to_csv(df: pl.DataFrame, dest: str, append: bool) -> None:
+    if append:
+        with open(dest, "a") as f:
+            df.write_csv(f, include_header=False)
+    else:
+        df.write_csv(dest)
 
 
 # %%